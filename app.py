@@ -1,6 +1,7 @@
 from fastapi import FastAPI, UploadFile, File, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from PIL import Image
 import io
 import traceback
@@ -36,8 +37,8 @@ async def generate_meme(image: UploadFile = File(...)):
         image_data = await image.read()
         pil_image = Image.open(io.BytesIO(image_data)).convert("RGB")
 
-        # Run pipeline
-        meme_artifact = pipeline.run(pil_image)
+        # Run pipeline off the event loop; it blocks on model inference and caption calls
+        meme_artifact = await run_in_threadpool(pipeline.run, pil_image)
 
         # Reset BytesIO pointer
         meme_artifact.meme_image.seek(0)
@@ -0,0 +1,210 @@
+from src.exceptions import CustomException
+from src.logger import logging
+
+import sys, time, random, threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.entity.config import ConfigEntity, CaptionClientConfig
+
+
+class CaptionUnavailableError(Exception):
+    """Raised when no caption could be fetched from the upstream within the deadline."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open probe."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        """Return (allowed, is_probe) for a call that wants to go upstream now.
+
+        Only the caller that got is_probe=True holds the half-open probe slot and
+        must hand it back through record_success/record_failure/release.
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True, False
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                logging.info("Caption circuit breaker half-open, sending probe request.")
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True, True
+            return False, False
+
+    def record_success(self, is_probe=False):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logging.info("Caption circuit breaker closed, upstream healthy again.")
+            self.state = self.CLOSED
+            self.failures = 0
+            if is_probe:
+                self._probe_in_flight = False
+
+    def record_failure(self, is_probe=False):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logging.warning(f"Caption circuit breaker opened after {self.failures} consecutive failures.")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+            if is_probe:
+                self._probe_in_flight = False
+
+    def release(self, is_probe=False):
+        """Give back a probe slot whose call ended without reaching the upstream."""
+        if not is_probe:
+            return
+        with self._lock:
+            self._probe_in_flight = False
+
+
+class CaptionClient:
+    RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+    FATAL_STATUS = {401, 403, 404}
+
+    def __init__(self, config: CaptionClientConfig = None):
+        try:
+            logging.info("Initializing CaptionClient...")
+            self.caption_client_config = config or CaptionClientConfig(config=ConfigEntity())
+            cfg = self.caption_client_config
+
+            self.url = f"{cfg.base_url.rstrip('/')}/v1beta/models/{cfg.gemini_model_name}:generateContent"
+            self.session = requests.Session()
+            self.session.headers.update({
+                "Content-Type": "application/json",
+                "x-goog-api-key": cfg.gemini_api_key,
+            })
+            # Retries are handled here so they respect the total deadline, not by urllib3.
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=cfg.pool_size, max_retries=0)
+            self.session.mount("http://", adapter)
+            self.session.mount("https://", adapter)
+
+            self.slots = threading.BoundedSemaphore(cfg.max_concurrency)
+            self.breaker = CircuitBreaker(cfg.failure_threshold, cfg.reset_timeout)
+            logging.info(f"CaptionClient initialized for {self.url}")
+        except Exception as e:
+            logging.error("Error initializing CaptionClient", exc_info=True)
+            raise CustomException(e, sys)
+
+    def generate_text(self, prompt):
+        """Return the model's text for the prompt, or raise CaptionUnavailableError."""
+        cfg = self.caption_client_config
+
+        allowed, is_probe = self.breaker.allow_request()
+        if not allowed:
+            raise CaptionUnavailableError("Caption circuit breaker is open")
+
+        # Waiting for a local slot says nothing about upstream health, so it has its
+        # own limit and never counts against the breaker or the upstream deadline.
+        if not self.slots.acquire(timeout=cfg.queue_timeout):
+            self.breaker.release(is_probe)
+            raise CaptionUnavailableError("Timed out waiting for a free caption slot")
+
+        try:
+            deadline = time.monotonic() + cfg.total_deadline
+            attempts = 0
+            last_error = None
+            for attempt in range(cfg.max_retries + 1):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                attempts += 1
+                retry_after = None
+                try:
+                    response = self.session.post(
+                        self.url,
+                        json={"contents": [{"parts": [{"text": prompt}]}]},
+                        timeout=(min(cfg.connect_timeout, remaining), min(cfg.read_timeout, remaining)),
+                    )
+                except requests.RequestException as e:
+                    last_error = e
+                else:
+                    if response.status_code == 200:
+                        text = self._extract_text(response.json())
+                        self.breaker.record_success(is_probe)
+                        return text
+                    last_error = requests.HTTPError(f"{response.status_code} from caption upstream: {response.text[:200]}")
+                    if response.status_code in self.FATAL_STATUS:
+                        # Bad key or model name: every call will fail until config changes.
+                        logging.error(f"Caption upstream rejected the request: {last_error}")
+                        self.breaker.record_failure(is_probe)
+                        raise CaptionUnavailableError(str(last_error))
+                    if response.status_code not in self.RETRYABLE_STATUS:
+                        # The upstream answered; the request itself is wrong, so retrying won't help.
+                        self.breaker.record_success(is_probe)
+                        raise CaptionUnavailableError(str(last_error))
+                    if response.status_code == 429:
+                        retry_after = self._retry_after(response)
+
+                logging.warning(f"Caption attempt {attempt + 1} failed: {last_error}")
+                if attempt == cfg.max_retries:
+                    break
+                if retry_after is not None:
+                    backoff = retry_after
+                else:
+                    # Full jitter: sleep a random amount up to the exponential cap.
+                    backoff = random.uniform(0, min(cfg.backoff_max, cfg.backoff_base * (2 ** attempt)))
+                if time.monotonic() + backoff >= deadline:
+                    break
+                time.sleep(backoff)
+
+            if not attempts:
+                self.breaker.release(is_probe)
+                raise CaptionUnavailableError("Caption deadline expired before any upstream attempt")
+            self.breaker.record_failure(is_probe)
+            raise CaptionUnavailableError(f"Caption upstream failed: {last_error}")
+        except CaptionUnavailableError:
+            raise
+        except Exception as e:
+            self.breaker.record_failure(is_probe)
+            raise CaptionUnavailableError(f"Unexpected caption response: {e}") from e
+        finally:
+            self.slots.release()
+
+    def fallback_dialogues(self, emotion):
+        """Offline captions used when the upstream is unavailable."""
+        cfg = self.caption_client_config
+        return cfg.fallback_dialogues.get(str(emotion).lower(), cfg.default_dialogues)
+
+    @staticmethod
+    def _retry_after(response):
+        """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date), if any."""
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _extract_text(payload):
+        candidates = payload.get("candidates") or []
+        if not candidates:
+            return ""
+        parts = candidates[0].get("content", {}).get("parts", [])
+        return "".join(part.get("text", "") for part in parts)
+
+    def close(self):
+        self.session.close()
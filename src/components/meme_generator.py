@@ -2,14 +2,14 @@ from src.exceptions import CustomException
 from src.logger import logging
 
 import os, io, sys, json, random, requests
-import google.generativeai as genai
 
 from PIL import Image, ImageDraw, ImageFont
 import textwrap
 
 
-from src.entity.config import ConfigEntity,MemeGeneratorConfig
+from src.entity.config import ConfigEntity,MemeGeneratorConfig,CaptionClientConfig
 from src.entity.artifact import MemeGeneratorArtifact
+from src.components.caption_client import CaptionClient, CaptionUnavailableError
 
 
 from io import BytesIO
@@ -19,10 +19,9 @@ class MemesGenerator:
     def __init__(self):
         try:
             logging.info("Initializing MemesGenerator...")
-            self.meme_generator_config = MemeGeneratorConfig(config=ConfigEntity())
-
-            genai.configure(api_key=self.meme_generator_config.gemini_api_key)
-            self.model = genai.GenerativeModel( self.meme_generator_config.gemini_model_name)
+            config = ConfigEntity()
+            self.meme_generator_config = MemeGeneratorConfig(config=config)
+            self.caption_client = CaptionClient(config=CaptionClientConfig(config=config))
             logging.info("MemesGenerator initialized successfully.")
         except Exception as e:
             logging.error("Error initializing MemesGenerator", exc_info=True)
@@ -87,8 +86,12 @@ class MemesGenerator:
 
             RETURN ONLY TWO DIALOGUES – NO EXPLANATIONS, NO FORMATTING
             """
-            response = self.model.generate_content(prompt)
-            text = response.text.strip()
+            try:
+                text = self.caption_client.generate_text(prompt).strip()
+            except CaptionUnavailableError as e:
+                logging.warning(f"Caption upstream unavailable, using offline dialogues: {e}")
+                return self.caption_client.fallback_dialogues(emotion)
+
             lines = [line.strip() for line in text.split("\n") if line.strip()]
 
             if len(lines) >= 2:
@@ -96,10 +99,10 @@ class MemesGenerator:
                 return lines[0], lines[1]
             elif len(lines) == 1:
                 logging.warning("Only one dialogue received. Using fallback for second line.")
-                return lines[0], "Adhi kaadhu, idhi kaadhu!"
+                return lines[0], self.caption_client.caption_client_config.default_dialogues[1]
             else:
                 logging.warning("No dialogues generated. Using default fallback.")
-                return "Emaindhi asalu?", "Adhi kaadhu, idhi kaadhu!"
+                return self.caption_client.caption_client_config.default_dialogues
 
         except Exception as e:
             logging.error("Error generating meme dialogues", exc_info=True)
@@ -23,6 +23,20 @@ class ConfigEntity:
         self.templates_dir = TEMPLATES_DIR
         self.font_path = FONT_PATH
         self.memes = MEMES
+        self.gemini_api_base_url = GEMINI_API_BASE_URL
+        self.caption_connect_timeout = CAPTION_CONNECT_TIMEOUT
+        self.caption_read_timeout = CAPTION_READ_TIMEOUT
+        self.caption_total_deadline = CAPTION_TOTAL_DEADLINE
+        self.caption_queue_timeout = CAPTION_QUEUE_TIMEOUT
+        self.caption_max_retries = CAPTION_MAX_RETRIES
+        self.caption_backoff_base = CAPTION_BACKOFF_BASE
+        self.caption_backoff_max = CAPTION_BACKOFF_MAX
+        self.caption_pool_size = CAPTION_POOL_SIZE
+        self.caption_max_concurrency = CAPTION_MAX_CONCURRENCY
+        self.caption_failure_threshold = CAPTION_FAILURE_THRESHOLD
+        self.caption_reset_timeout = CAPTION_RESET_TIMEOUT
+        self.default_dialogues = DEFAULT_DIALOGUES
+        self.fallback_dialogues = FALLBACK_DIALOGUES
 
 
 class  ClassifyEmotionConfig:
@@ -67,4 +81,29 @@ class MemeGeneratorConfig:
             logging.info("MemeGeneratorConfig initialized successfully.")
         except Exception as e:
             logging.error("Failed to initialize MemeGeneratorConfig", exc_info=True)
-            raise CustomException(e, sys) from e
\ No newline at end of file
+            raise CustomException(e, sys) from e
+
+
+class CaptionClientConfig:
+    def __init__(self, config: ConfigEntity):
+        try:
+            self.gemini_model_name = config.gemini_model_name
+            self.gemini_api_key = config.gemini_api_key
+            self.base_url = config.gemini_api_base_url
+            self.connect_timeout = config.caption_connect_timeout
+            self.read_timeout = config.caption_read_timeout
+            self.total_deadline = config.caption_total_deadline
+            self.queue_timeout = config.caption_queue_timeout
+            self.max_retries = config.caption_max_retries
+            self.backoff_base = config.caption_backoff_base
+            self.backoff_max = config.caption_backoff_max
+            self.pool_size = config.caption_pool_size
+            self.max_concurrency = config.caption_max_concurrency
+            self.failure_threshold = config.caption_failure_threshold
+            self.reset_timeout = config.caption_reset_timeout
+            self.default_dialogues = config.default_dialogues
+            self.fallback_dialogues = config.fallback_dialogues
+            logging.info("CaptionClientConfig initialized successfully.")
+        except Exception as e:
+            logging.error("Failed to initialize CaptionClientConfig", exc_info=True)
+            raise CustomException(e, sys) from e
@@ -0,0 +1,223 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+
+from src.components.caption_client import CaptionClient, CaptionUnavailableError, CircuitBreaker
+from src.components.meme_generator import MemesGenerator
+from src.constants import DEFAULT_DIALOGUES, FALLBACK_DIALOGUES
+from src.entity.config import CaptionClientConfig
+
+
+class FakeUpstream:
+    """Local stand-in for the Gemini generateContent endpoint.
+
+    Each response is (status, delay_seconds, headers); the last one repeats.
+    """
+
+    def __init__(self):
+        self.responses = [(200, 0, {})]
+        self.hits = 0
+        self.lock = threading.Lock()
+
+    def next_response(self):
+        with self.lock:
+            index = min(self.hits, len(self.responses) - 1)
+            self.hits += 1
+            return self.responses[index]
+
+
+@pytest.fixture
+def upstream():
+    fake = FakeUpstream()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            status, delay, headers = fake.next_response()
+            time.sleep(delay)
+            body = json.dumps({"candidates": [{"content": {"parts": [{"text": "Setup line\nPunchline"}]}}]}).encode()
+            try:
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                # The client gave up on a slow response.
+                pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    fake.base_url = f"http://127.0.0.1:{server.server_port}"
+    yield fake
+    server.shutdown()
+    server.server_close()
+
+
+def make_client(upstream, **overrides):
+    settings = dict(
+        gemini_model_name="gemini-test",
+        gemini_api_key="test-key",
+        gemini_api_base_url=upstream.base_url,
+        caption_connect_timeout=1.0,
+        caption_read_timeout=2.0,
+        caption_total_deadline=3.0,
+        caption_queue_timeout=3.0,
+        caption_max_retries=2,
+        caption_backoff_base=0.01,
+        caption_backoff_max=0.02,
+        caption_pool_size=4,
+        caption_max_concurrency=4,
+        caption_failure_threshold=3,
+        caption_reset_timeout=0.3,
+        default_dialogues=DEFAULT_DIALOGUES,
+        fallback_dialogues=FALLBACK_DIALOGUES,
+    )
+    settings.update(overrides)
+    return CaptionClient(config=CaptionClientConfig(config=SimpleNamespace(**settings)))
+
+
+def test_retries_503_then_succeeds(upstream):
+    upstream.responses = [(503, 0, {}), (200, 0, {})]
+    client = make_client(upstream)
+
+    assert client.generate_text("prompt") == "Setup line\nPunchline"
+    assert upstream.hits == 2
+    assert client.breaker.state == CircuitBreaker.CLOSED
+    assert client.breaker.failures == 0
+
+
+def test_400_is_not_retried(upstream):
+    upstream.responses = [(400, 0, {})]
+    client = make_client(upstream)
+
+    with pytest.raises(CaptionUnavailableError):
+        client.generate_text("prompt")
+    assert upstream.hits == 1
+    assert client.breaker.failures == 0
+
+
+def test_401_is_not_retried_and_counts_as_failure(upstream):
+    upstream.responses = [(401, 0, {})]
+    client = make_client(upstream)
+
+    with pytest.raises(CaptionUnavailableError):
+        client.generate_text("prompt")
+    assert upstream.hits == 1
+    assert client.breaker.failures == 1
+
+
+def test_429_honours_retry_after(upstream):
+    upstream.responses = [(429, 0, {"Retry-After": "0.4"}), (200, 0, {})]
+    client = make_client(upstream)
+
+    start = time.monotonic()
+    assert client.generate_text("prompt") == "Setup line\nPunchline"
+    assert time.monotonic() - start >= 0.4
+    assert upstream.hits == 2
+
+
+def test_slow_upstream_hits_total_deadline(upstream):
+    upstream.responses = [(200, 1.5, {})]
+    client = make_client(upstream, caption_total_deadline=0.4)
+
+    start = time.monotonic()
+    with pytest.raises(CaptionUnavailableError):
+        client.generate_text("prompt")
+    assert time.monotonic() - start < 1.0
+    assert client.breaker.failures == 1
+
+
+def test_waiting_for_a_slot_does_not_trip_breaker(upstream):
+    upstream.responses = [(200, 0.3, {})]
+    client = make_client(upstream, caption_max_concurrency=1, caption_total_deadline=0.5)
+    results, errors = [], []
+
+    def call():
+        try:
+            results.append(client.generate_text("prompt"))
+        except CaptionUnavailableError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(results) == 2
+    assert client.breaker.failures == 0
+
+
+def test_breaker_opens_and_generator_uses_fallback(upstream):
+    upstream.responses = [(503, 0, {})]
+    client = make_client(upstream, caption_max_retries=0, caption_failure_threshold=2)
+
+    for _ in range(2):
+        with pytest.raises(CaptionUnavailableError):
+            client.generate_text("prompt")
+    assert client.breaker.state == CircuitBreaker.OPEN
+    assert upstream.hits == 2
+
+    generator = MemesGenerator.__new__(MemesGenerator)
+    generator.caption_client = client
+    assert generator.generate_meme_dialogues("Happy") == FALLBACK_DIALOGUES["happy"]
+    assert upstream.hits == 2
+
+
+def test_only_probe_holder_releases_probe_slot():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    assert breaker.allow_request() == (True, False)
+    breaker.record_failure()
+
+    assert breaker.allow_request() == (True, True)
+    breaker.release(is_probe=False)
+    assert breaker.allow_request() == (False, False)
+    breaker.release(is_probe=True)
+    assert breaker.allow_request() == (True, True)
+
+
+def test_half_open_sends_single_probe_and_closes(upstream):
+    upstream.responses = [(503, 0, {})]
+    client = make_client(upstream, caption_max_retries=0, caption_failure_threshold=1)
+
+    with pytest.raises(CaptionUnavailableError):
+        client.generate_text("prompt")
+    assert client.breaker.state == CircuitBreaker.OPEN
+
+    upstream.responses = [(200, 0.3, {})]
+    upstream.hits = 0
+    time.sleep(0.35)
+    results, errors = [], []
+
+    def call():
+        try:
+            results.append(client.generate_text("prompt"))
+        except CaptionUnavailableError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert upstream.hits == 1
+    assert len(results) == 1
+    assert len(errors) == 3
+    assert client.breaker.state == CircuitBreaker.CLOSED
+    assert client.generate_text("prompt") == "Setup line\nPunchline"